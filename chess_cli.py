@@ -11,20 +11,64 @@ No study clearing/deleting chapters.
 from __future__ import annotations
 
 import argparse
+import functools
 import os
+import re
 import sys
 from pathlib import Path
-from typing import List
+
+
+# The .env files can't change under a running process, so load them once.
+_DOTENV_LOADED = False
+
+# KEY=value with optional single/double quoting; one C-level regex scan over
+# the raw bytes replaces the per-line strip/split/strip-quotes dance.
+# Comment and malformed lines simply never match.
+_DOTENV_RE = re.compile(
+    rb"^[ \t]*([A-Za-z_][A-Za-z0-9_]*)[ \t]*=[ \t]*"
+    rb"(?:\"([^\"\n]*)\"|'([^'\n]*)'|([^\n]*))",
+    re.MULTILINE,
+)
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_dotenv_file(path: str) -> dict:
+    """
+    Parse one .env file into a {key: value} dict. Cached per path so a file
+    is read and tokenized at most once per process.
+    """
+    try:
+        # one open+read instead of a separate exists() stat
+        data = Path(path).read_bytes()
+    except OSError:
+        return {}
+    env: dict = {}
+    for m in _DOTENV_RE.finditer(data):
+        key = m.group(1).decode("ascii")
+        if key in env:
+            continue
+        dq, sq, bare = m.group(2), m.group(3), m.group(4)
+        raw = dq if dq is not None else sq if sq is not None else (bare or b"").strip()
+        try:
+            env[key] = raw.decode("utf-8")
+        except UnicodeDecodeError:
+            continue
+    return env
 
 
 def _load_dotenv() -> None:
     """
     Best-effort .env loader.
-    Search order (first found wins per-variable via os.environ.setdefault):
+    Search order (first found wins per-variable):
       1) current working directory: ./.env
       2) script directory: <dir_of_this_file>/.env
       3) user config: ~/.config/chess-study/.env
     """
+    global _DOTENV_LOADED
+    if _DOTENV_LOADED:
+        return
+    _DOTENV_LOADED = True
+
     candidates = []
     candidates.append(Path(os.getcwd()) / ".env")
     try:
@@ -35,20 +79,11 @@ def _load_dotenv() -> None:
     candidates.append(Path(home) / ".config" / "chess-study" / ".env")
 
     for p in candidates:
-        try:
-            if not p.exists():
-                continue
-            with p.open("r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line or line.startswith("#") or "=" not in line:
-                        continue
-                    k, v = line.split("=", 1)
-                    k = k.strip()
-                    v = v.strip().strip('"').strip("'")
-                    os.environ.setdefault(k, v)
-        except Exception:
-            continue
+        for k, v in _parse_dotenv_file(str(p)).items():
+            # equivalent to os.environ.setdefault, spelled out: only new
+            # keys go through the os.environ[k] = v putenv path
+            if k not in os.environ:
+                os.environ[k] = v
 
 
 def _ensure_data_dir(data_dir: str) -> str:
@@ -57,19 +92,28 @@ def _ensure_data_dir(data_dir: str) -> str:
     return str(p)
 
 
-def _run_module_main(module_name: str, argv: List[str]) -> int:
-    mod = __import__(module_name, fromlist=["main"])
-    if not hasattr(mod, "main"):
-        raise SystemExit(f"Module {module_name} has no main()")
+def _with_argv(prog: str, argv: list[str], fn) -> int:
     old_argv = sys.argv
     try:
-        sys.argv = [module_name] + argv
-        mod.main()
+        sys.argv = [prog] + argv
+        fn()
         return 0
     finally:
         sys.argv = old_argv
 
 
+def _run_chesscom(argv: list[str]) -> int:
+    from chesscom import main
+
+    return _with_argv("chesscom", argv, main)
+
+
+def _run_lichess(argv: list[str]) -> int:
+    from lichess import main
+
+    return _with_argv("lichess", argv, main)
+
+
 def _require_username(u: str) -> str:
     u = (u or "").strip()
     if not u:
@@ -77,9 +121,230 @@ def _require_username(u: str) -> str:
     return u
 
 
+# Subcommand help for the top-level parser. The full per-command parsers are
+# built lazily in the _cmd_* functions below, so `chess-study --help` and
+# dispatch never pay for the argparse Actions of the other three commands.
+_COMMANDS = {
+    "analyze": "Fetch games from Chess.com, run Stockfish, write data/*",
+    "upload-top": "Upload biggest blunder per game to Lichess Study as chapters",
+    "sync": "Run analyze, then upload-top",
+    "timeline": "Show a colored move timeline per game from data/moves.csv",
+}
+
+
+def _add_analyze_args(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument(
+        "username",
+        nargs="?",
+        default=os.getenv("CHESSCOM_USER", ""),
+        help="Chess.com username (or env CHESSCOM_USER)",
+    )
+    ap.add_argument("--max-games", type=int, default=50)
+    ap.add_argument("--depth", type=int, default=None, help="Search depth (default: 12)")
+    ap.add_argument("--nodes", type=int, default=None, help="Node budget per analysis (default: 50000; 0 = use --time/--depth)")
+    ap.add_argument("--time", type=float, default=None, help="Seconds per analysis when --nodes is 0")
+    ap.add_argument("--hash-mb", type=int, default=None, help="Stockfish hash size per worker in MB (default: 128)")
+    ap.add_argument("--book", default="", help="Polyglot opening book (.bin)")
+    ap.add_argument("--stockfish", default="stockfish")
+    ap.add_argument("--user-agent", default="my-chess-analysis/0.1 (contact: you@example.com)")
+
+    # thresholds
+    ap.add_argument("--inacc-cp", type=int, default=75)
+    ap.add_argument("--mistake-cp", type=int, default=150)
+    ap.add_argument("--blunder-cp", type=int, default=300)
+
+
+def _add_study_args(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--study", default=os.getenv("LICHESS_STUDY_ID", ""), help="Study ID (or env LICHESS_STUDY_ID)")
+    ap.add_argument("--token", default=os.getenv("LICHESS_TOKEN", ""), help="Token (or env LICHESS_TOKEN)")
+    ap.add_argument("--metric", choices=["wp_loss", "cp_loss", "wp_swing"], default="cp_loss")
+    ap.add_argument("--limit", type=int, default=0)
+
+
+def _require_study_args(args: argparse.Namespace) -> None:
+    if not args.study:
+        raise SystemExit("Missing --study (or env LICHESS_STUDY_ID).")
+    if not args.token:
+        raise SystemExit("Missing --token (or env LICHESS_TOKEN).")
+
+
+def _analyze_argv(args: argparse.Namespace, data_dir: str) -> list[str]:
+    argv = [
+        args.username,
+        "--data-dir",
+        data_dir,
+        "--max-games",
+        str(args.max_games),
+        "--stockfish",
+        args.stockfish,
+        "--user-agent",
+        args.user_agent,
+        "--inacc-cp",
+        str(args.inacc_cp),
+        "--mistake-cp",
+        str(args.mistake_cp),
+        "--blunder-cp",
+        str(args.blunder_cp),
+    ]
+
+    # chesscom.py defaults to a node budget that beats --depth/--time in
+    # resolve_limit; when the user asks for a depth or time without an
+    # explicit node count, suppress that default so the flag takes effect.
+    nodes = args.nodes
+    if nodes is None and (args.depth is not None or args.time is not None):
+        nodes = 0
+    if nodes is not None:
+        argv += ["--nodes", str(nodes)]
+    if args.depth is not None:
+        argv += ["--depth", str(args.depth)]
+    if args.time is not None:
+        argv += ["--time", str(args.time)]
+    if args.hash_mb is not None:
+        argv += ["--hash-mb", str(args.hash_mb)]
+    if args.book:
+        argv += ["--book", args.book]
+    return argv
+
+
+def _cmd_analyze(rest: list[str], data_dir: str) -> None:
+    ap = argparse.ArgumentParser(prog="chess-study analyze", description=_COMMANDS["analyze"])
+    _add_analyze_args(ap)
+
+    # optional overrides (rarely needed)
+    ap.add_argument("--out", default="summary.csv")
+    ap.add_argument("--moves-out", default="moves.csv")
+    ap.add_argument("--blunders-csv", default="blunders.csv")
+    ap.add_argument("--blunders-pgn", default="blunders.pgn")
+
+    args = ap.parse_args(rest)
+    args.username = _require_username(args.username)
+
+    argv = _analyze_argv(args, data_dir) + [
+        "--out",
+        args.out,
+        "--moves-out",
+        args.moves_out,
+        "--blunders-csv",
+        args.blunders_csv,
+        "--blunders-pgn",
+        args.blunders_pgn,
+    ]
+    raise SystemExit(_run_chesscom(argv))
+
+
+def _cmd_upload_top(rest: list[str], data_dir: str) -> None:
+    ap = argparse.ArgumentParser(prog="chess-study upload-top", description=_COMMANDS["upload-top"])
+    _add_study_args(ap)
+    ap.add_argument("--blunders-csv", default="", help="Path to blunders.csv (default: <data-dir>/blunders.csv)")
+    ap.add_argument("--sleep", type=float, default=0.6)
+    ap.add_argument("--dry-run", action="store_true")
+    args = ap.parse_args(rest)
+    _require_study_args(args)
+
+    blunders_csv = args.blunders_csv or str(Path(data_dir) / "blunders.csv")
+    argv = [
+        "--study",
+        args.study,
+        "--token",
+        args.token,
+        "upload-top",
+        "--blunders-csv",
+        blunders_csv,
+        "--metric",
+        args.metric,
+        "--sleep",
+        str(args.sleep),
+    ]
+    if args.limit:
+        argv += ["--limit", str(args.limit)]
+    if args.dry_run:
+        argv += ["--dry-run"]
+    raise SystemExit(_run_lichess(argv))
+
+
+def _cmd_sync(rest: list[str], data_dir: str) -> None:
+    ap = argparse.ArgumentParser(prog="chess-study sync", description=_COMMANDS["sync"])
+    _add_analyze_args(ap)
+    _add_study_args(ap)
+    args = ap.parse_args(rest)
+
+    args.username = _require_username(args.username)
+    _require_study_args(args)
+
+    # 1) analyze
+    _run_chesscom(_analyze_argv(args, data_dir))
+
+    # 2) upload-top
+    blunders_csv = str(Path(data_dir) / "blunders.csv")
+    up_argv = [
+        "--study",
+        args.study,
+        "--token",
+        args.token,
+        "upload-top",
+        "--blunders-csv",
+        blunders_csv,
+        "--metric",
+        args.metric,
+    ]
+    if args.limit:
+        up_argv += ["--limit", str(args.limit)]
+    _run_lichess(up_argv)
+    raise SystemExit(0)
+
+
+def _cmd_timeline(rest: list[str], data_dir: str) -> None:
+    ap = argparse.ArgumentParser(prog="chess-study timeline", description=_COMMANDS["timeline"])
+    ap.add_argument("--moves", default="", help="Path to moves.csv (default: <data-dir>/moves.csv)")
+    ap.add_argument("--limit", type=int, default=10)
+    ap.add_argument("--my-moves-only", action="store_true")
+    ap.add_argument("--no-color", action="store_true")
+    ap.add_argument("--dot", default="●")
+    ap.add_argument("--sep-every", type=int, default=5)
+    ap.add_argument("--show-positions", action="store_true")
+    args = ap.parse_args(rest)
+
+    import timeline as tl
+
+    moves = args.moves or str(Path(data_dir) / "moves.csv")
+    tl_argv = [
+        "--data-dir",
+        data_dir,
+        "--moves",
+        moves,
+        "--limit",
+        str(args.limit),
+        "--dot",
+        args.dot,
+        "--sep-every",
+        str(args.sep_every),
+    ]
+    if args.my_moves_only:
+        tl_argv.append("--my-moves-only")
+    if args.no_color:
+        tl_argv.append("--no-color")
+    if args.show_positions:
+        tl_argv.append("--show-positions")
+
+    raise SystemExit(tl.main(tl_argv))
+
+
+_CMD_DISPATCH = {
+    "analyze": _cmd_analyze,
+    "upload-top": _cmd_upload_top,
+    "sync": _cmd_sync,
+    "timeline": _cmd_timeline,
+}
+
+
 def main() -> None:
     _load_dotenv()
 
+    # Phase 1: a minimal top-level parser with stub subcommands (add_help
+    # off so -h/--help flows through to the real per-command parser). Only
+    # the selected command's parser is ever built, in phase 2 — so
+    # `chess-study --help` and a mistyped command only ever allocate the
+    # four empty stubs, never the 20+ Actions of the full command parsers.
     ap = argparse.ArgumentParser(
         prog="chess-study",
         description="One CLI for Chess.com analysis + Lichess study publishing.",
@@ -91,207 +356,14 @@ def main() -> None:
     )
 
     sub = ap.add_subparsers(dest="cmd", required=True)
+    for name, help_text in _COMMANDS.items():
+        sub.add_parser(name, help=help_text, add_help=False)
 
-    # ---- analyze ----
-    p_an = sub.add_parser("analyze", help="Fetch games from Chess.com, run Stockfish, write data/*")
-    p_an.add_argument(
-        "username",
-        nargs="?",
-        default=os.getenv("CHESSCOM_USER", ""),
-        help="Chess.com username (or env CHESSCOM_USER)",
-    )
-    p_an.add_argument("--max-games", type=int, default=50)
-    p_an.add_argument("--depth", type=int, default=12)
-    p_an.add_argument("--stockfish", default="stockfish")
-    p_an.add_argument("--user-agent", default="my-chess-analysis/0.1 (contact: you@example.com)")
-
-    # optional overrides (rarely needed)
-    p_an.add_argument("--out", default="summary.csv")
-    p_an.add_argument("--moves-out", default="moves.csv")
-    p_an.add_argument("--blunders-csv", default="blunders.csv")
-    p_an.add_argument("--blunders-pgn", default="blunders.pgn")
-
-    # thresholds
-    p_an.add_argument("--inacc-cp", type=int, default=75)
-    p_an.add_argument("--mistake-cp", type=int, default=150)
-    p_an.add_argument("--blunder-cp", type=int, default=300)
-
-    # ---- upload-top ----
-    p_up = sub.add_parser("upload-top", help="Upload biggest blunder per game to Lichess Study as chapters")
-    p_up.add_argument("--study", default=os.getenv("LICHESS_STUDY_ID", ""), help="Study ID (or env LICHESS_STUDY_ID)")
-    p_up.add_argument("--token", default=os.getenv("LICHESS_TOKEN", ""), help="Token (or env LICHESS_TOKEN)")
-    p_up.add_argument("--blunders-csv", default="", help="Path to blunders.csv (default: <data-dir>/blunders.csv)")
-    p_up.add_argument("--metric", choices=["wp_loss", "cp_loss", "wp_swing"], default="cp_loss")
-    p_up.add_argument("--limit", type=int, default=0)
-    p_up.add_argument("--sleep", type=float, default=0.6)
-    p_up.add_argument("--dry-run", action="store_true")
-
-    # ---- sync (analyze -> upload-top) ----
-    p_sy = sub.add_parser("sync", help="Run analyze, then upload-top")
-    p_sy.add_argument(
-        "username",
-        nargs="?",
-        default=os.getenv("CHESSCOM_USER", ""),
-        help="Chess.com username (or env CHESSCOM_USER)",
-    )
-    p_sy.add_argument("--max-games", type=int, default=50)
-    p_sy.add_argument("--depth", type=int, default=12)
-    p_sy.add_argument("--stockfish", default="stockfish")
-    p_sy.add_argument("--user-agent", default="my-chess-analysis/0.1 (contact: you@example.com)")
-
-    # thresholds (FIX: these MUST exist on sync if you want to pass them)
-    p_sy.add_argument("--inacc-cp", type=int, default=75)
-    p_sy.add_argument("--mistake-cp", type=int, default=150)
-    p_sy.add_argument("--blunder-cp", type=int, default=300)
-
-    p_sy.add_argument("--study", default=os.getenv("LICHESS_STUDY_ID", ""), help="Study ID (or env LICHESS_STUDY_ID)")
-    p_sy.add_argument("--token", default=os.getenv("LICHESS_TOKEN", ""), help="Token (or env LICHESS_TOKEN)")
-    p_sy.add_argument("--metric", choices=["wp_loss", "cp_loss", "wp_swing"], default="cp_loss")
-    p_sy.add_argument("--limit", type=int, default=0)
-
-    # ---- timeline ----
-    p_tl = sub.add_parser("timeline", help="Show a colored move timeline per game from data/moves.csv")
-    p_tl.add_argument("--moves", default="", help="Path to moves.csv (default: <data-dir>/moves.csv)")
-    p_tl.add_argument("--limit", type=int, default=10)
-    p_tl.add_argument("--my-moves-only", action="store_true")
-    p_tl.add_argument("--no-color", action="store_true")
-    p_tl.add_argument("--dot", default="●")
-    p_tl.add_argument("--sep-every", type=int, default=5)
-    p_tl.add_argument("--show-positions", action="store_true")
-
-    args = ap.parse_args()
+    args, rest = ap.parse_known_args()
     data_dir = _ensure_data_dir(args.data_dir)
 
-    if args.cmd == "analyze":
-        args.username = _require_username(args.username)
-        argv = [
-            args.username,
-            "--data-dir",
-            data_dir,
-            "--max-games",
-            str(args.max_games),
-            "--depth",
-            str(args.depth),
-            "--stockfish",
-            args.stockfish,
-            "--user-agent",
-            args.user_agent,
-            "--out",
-            args.out,
-            "--moves-out",
-            args.moves_out,
-            "--blunders-csv",
-            args.blunders_csv,
-            "--blunders-pgn",
-            args.blunders_pgn,
-            "--inacc-cp",
-            str(args.inacc_cp),
-            "--mistake-cp",
-            str(args.mistake_cp),
-            "--blunder-cp",
-            str(args.blunder_cp),
-        ]
-        raise SystemExit(_run_module_main("chesscom", argv))
-
-    if args.cmd == "upload-top":
-        if not args.study:
-            raise SystemExit("Missing --study (or env LICHESS_STUDY_ID).")
-        if not args.token:
-            raise SystemExit("Missing --token (or env LICHESS_TOKEN).")
-
-        blunders_csv = args.blunders_csv or str(Path(data_dir) / "blunders.csv")
-        argv = [
-            "--study",
-            args.study,
-            "--token",
-            args.token,
-            "upload-top",
-            "--blunders-csv",
-            blunders_csv,
-            "--metric",
-            args.metric,
-            "--sleep",
-            str(args.sleep),
-        ]
-        if args.limit:
-            argv += ["--limit", str(args.limit)]
-        if args.dry_run:
-            argv += ["--dry-run"]
-        raise SystemExit(_run_module_main("lichess", argv))
-
-    if args.cmd == "sync":
-        args.username = _require_username(args.username)
-        if not args.study:
-            raise SystemExit("Missing --study (or env LICHESS_STUDY_ID).")
-        if not args.token:
-            raise SystemExit("Missing --token (or env LICHESS_TOKEN).")
-
-        # 1) analyze
-        _run_module_main(
-            "chesscom",
-            [
-                args.username,
-                "--data-dir",
-                data_dir,
-                "--max-games",
-                str(args.max_games),
-                "--depth",
-                str(args.depth),
-                "--stockfish",
-                args.stockfish,
-                "--user-agent",
-                args.user_agent,
-                "--inacc-cp",
-                str(args.inacc_cp),
-                "--mistake-cp",
-                str(args.mistake_cp),
-                "--blunder-cp",
-                str(args.blunder_cp),
-            ],
-        )
-
-        # 2) upload-top
-        blunders_csv = str(Path(data_dir) / "blunders.csv")
-        up_argv = [
-            "--study",
-            args.study,
-            "--token",
-            args.token,
-            "upload-top",
-            "--blunders-csv",
-            blunders_csv,
-            "--metric",
-            args.metric,
-        ]
-        if args.limit:
-            up_argv += ["--limit", str(args.limit)]
-        _run_module_main("lichess", up_argv)
-        raise SystemExit(0)
-
-    if args.cmd == "timeline":
-        import timeline as tl
-
-        moves = args.moves or str(Path(data_dir) / "moves.csv")
-        tl_argv = [
-            "--data-dir",
-            data_dir,
-            "--moves",
-            moves,
-            "--limit",
-            str(args.limit),
-            "--dot",
-            args.dot,
-            "--sep-every",
-            str(args.sep_every),
-        ]
-        if args.my_moves_only:
-            tl_argv.append("--my-moves-only")
-        if args.no_color:
-            tl_argv.append("--no-color")
-        if args.show_positions:
-            tl_argv.append("--show-positions")
-
-        raise SystemExit(tl.main(tl_argv))
+    # Phase 2: build + run just the chosen command.
+    _CMD_DISPATCH[args.cmd](rest, data_dir)
 
 
 if __name__ == "__main__":
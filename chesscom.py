@@ -1,41 +1,225 @@
 #!/usr/bin/env python3
 import argparse
+import asyncio
+import atexit
 import csv
 import io
+import json
 import math
+import os
+import queue
 import shutil
+import sqlite3
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
+from multiprocessing import get_context
 from pathlib import Path
 
 import requests
+from requests.adapters import HTTPAdapter, Retry
 import chess
-import chess.pgn
 import chess.engine
+import chess.pgn
+import chess.polyglot
 
 API_BASE = "https://api.chess.com/pub"
 
+SUMMARY_FIELDS = [
+    "end_time_utc",
+    "time_class",
+    "rules",
+    "color",
+    "opponent",
+    "my_rating_after",
+    "my_result_code",
+    "my_accuracy",
+    "plies_analyzed",
+    "inaccuracies",
+    "mistakes",
+    "blunders",
+    "max_cp_loss",
+    "max_wp_loss",
+    "max_wp_swing",
+    "game_url",
+]
+
+MOVE_FIELDS = [
+    "game_url",
+    "end_time_utc",
+    "opponent",
+    "my_color",
+    "ply",
+    "move_number",
+    "move_san",
+    "move_uci",
+    "side_to_move",
+    "is_my_move",
+
+    "eval_before_kind",
+    "eval_before_cp",
+    "eval_before_mate",
+    "eval_after_kind",
+    "eval_after_cp",
+    "eval_after_mate",
+    "wp_before",
+    "wp_after",
+    "wp_swing",
+
+    "best_move_san",
+    "best_move_uci",
+    "eval_best_after_kind",
+    "eval_best_after_cp",
+    "eval_best_after_mate",
+    "eval_played_after_kind",
+    "eval_played_after_cp",
+    "eval_played_after_mate",
+    "wp_best_after",
+    "wp_played_after",
+    "wp_loss",
+    "cp_loss",
+    "label",
+
+    # fen_after is not stored: it equals the next row's fen_before, and the
+    # final position lives in positions_final.csv (see POSITION_FIELDS).
+    "fen_before",
+]
+
+# Companion one-row-per-game file so consumers can reconstruct
+# fen_after[n] = fen_before[n+1], falling back to fen_final for the last ply.
+POSITION_FIELDS = [
+    "game_url",
+    "fen_final",
+]
+
+BLUNDER_FIELDS = [
+    "game_url",
+    "end_time_utc",
+    "opponent",
+    "my_color",
+    "ply",
+    "move_number",
+    "played_move_san",
+    "played_move_uci",
+    "best_move_san",
+    "best_move_uci",
+    "wp_loss",
+    "cp_loss",
+    "fen_before",
+    "fen_after",
+]
+
+
+# One pooled keep-alive session for all Chess.com traffic: the TLS
+# handshake is paid once and reused across the archive index and every
+# month fetch, with automatic exponential backoff on 429/5xx (requests
+# honors Retry-After).
+_SESSION: requests.Session | None = None
+
+
+def _http_session() -> requests.Session:
+    global _SESSION
+    if _SESSION is None:
+        s = requests.Session()
+        retry = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 502, 503, 504],
+        )
+        s.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=retry))
+        _SESSION = s
+    return _SESSION
+
 
 def http_get_json(url: str, user_agent: str) -> dict:
-    r = requests.get(url, headers={"User-Agent": user_agent}, timeout=30)
+    r = _http_session().get(url, headers={"User-Agent": user_agent}, timeout=30)
     r.raise_for_status()
     return r.json()
 
 
-def iter_recent_games(username: str, max_games: int, user_agent: str):
+def _month_cache_path(cache_dir: Path, username: str, month_url: str) -> Path:
+    yyyy, mm = month_url.rstrip("/").split("/")[-2:]
+    return cache_dir / username / f"{yyyy}-{mm}.json"
+
+
+def fetch_month(
+    session: requests.Session,
+    month_url: str,
+    user_agent: str,
+    username: str,
+    cache_dir: Path | None,
+) -> dict:
+    """
+    Fetch one monthly archive. Months other than the current one are
+    immutable, so they are served from (and written to) a disk cache.
+    """
+    yyyy, mm = month_url.rstrip("/").split("/")[-2:]
+    now = datetime.now(timezone.utc)
+    is_current = (int(yyyy), int(mm)) == (now.year, now.month)
+
+    path = _month_cache_path(cache_dir, username, month_url) if cache_dir else None
+    if path is not None and not is_current and path.exists():
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except Exception:
+            pass  # corrupt cache entry; refetch below
+
+    r = session.get(month_url, headers={"User-Agent": user_agent}, timeout=30)
+    r.raise_for_status()
+    month = r.json()
+
+    if path is not None and not is_current:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(month), encoding="utf-8")
+        except Exception:
+            pass  # cache is best-effort
+    return month
+
+
+def iter_recent_games(username: str, max_games: int, user_agent: str, cache_dir: Path | None = None):
     """
     Yields game JSON objects newest-first from monthly archives.
+
+    Months are prefetched a few ahead on a small thread pool (capped at 2
+    concurrent requests to stay polite with Chess.com's rate limits) over a
+    single pooled session, so TCP/TLS setup is paid once and the download
+    of month N+1 overlaps consumption of month N.
     """
     archives_url = f"{API_BASE}/player/{username}/games/archives"
     archives = http_get_json(archives_url, user_agent).get("archives", [])
-    for month_url in reversed(archives):
-        month = http_get_json(month_url, user_agent)
-        games = month.get("games", [])
-        games.sort(key=lambda g: g.get("end_time", 0), reverse=True)
-        for g in games:
-            yield g
-            max_games -= 1
-            if max_games <= 0:
-                return
+
+    session = _http_session()
+
+    month_urls = list(reversed(archives))
+    prefetch = 4
+    next_i = 0
+
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        futures: deque = deque()
+
+        def top_up():
+            nonlocal next_i
+            while next_i < len(month_urls) and len(futures) < prefetch:
+                futures.append(
+                    ex.submit(fetch_month, session, month_urls[next_i], user_agent, username, cache_dir)
+                )
+                next_i += 1
+
+        top_up()
+        while futures:
+            month = futures.popleft().result()
+            top_up()
+            games = month.get("games", [])
+            games.sort(key=lambda g: g.get("end_time", 0), reverse=True)
+            for g in games:
+                yield g
+                max_games -= 1
+                if max_games <= 0:
+                    for f in futures:
+                        f.cancel()
+                    return
 
 
 def pick_my_color(game: dict, username: str) -> chess.Color | None:
@@ -69,6 +253,11 @@ def score_white(info):
     return {"kind": "cp", "cp": int(cp), "mate": None}
 
 
+# Shared empty eval for plies with no blunder scoring; read-only, so one
+# instance serves every ply instead of two fresh dicts per iteration.
+_EVAL_EMPTY = {"kind": "", "cp": "", "mate": ""}
+
+
 def mate_to_pseudo_cp(mate: int) -> int:
     """
     Convert mate-in-N to a bounded cp-like value for win-prob mapping.
@@ -79,11 +268,24 @@ def mate_to_pseudo_cp(mate: int) -> int:
     return sign * max(6000, 10000 - 300 * min(n, 10))
 
 
+# Precomputed win probability for every cp value in [-10000, 10000]; the
+# function is called several times per ply and the table turns a math.pow
+# call into an index. mate_to_pseudo_cp already stays within this range.
+_WP_MAX_CP = 10000
+_WP_TABLE = [
+    1.0 / (1.0 + math.pow(10.0, -cp / 400.0))
+    for cp in range(-_WP_MAX_CP, _WP_MAX_CP + 1)
+]
+
+
 def win_prob_from_cp(cp: int) -> float:
     """
     Rough mapping from centipawns (White POV) to win probability for White.
     Not Chess.com's exact bar, but stable for swing tracking.
     """
+    cp = int(cp)
+    if -_WP_MAX_CP <= cp <= _WP_MAX_CP:
+        return _WP_TABLE[cp + _WP_MAX_CP]
     return 1.0 / (1.0 + math.pow(10.0, -cp / 400.0))
 
 
@@ -95,6 +297,148 @@ def win_prob_from_eval(eval_obj) -> float:
     return win_prob_from_cp(int(cp))
 
 
+def _signed64(h: int) -> int:
+    """
+    Fold an unsigned 64-bit Zobrist hash into SQLite's signed INTEGER range.
+    """
+    return h - (1 << 64) if h >= (1 << 63) else h
+
+
+def resolve_limit(depth: int, nodes: int = 0, time_s: float = 0.0) -> tuple[chess.engine.Limit, str, int]:
+    """
+    Pick the engine limiter: nodes beats time beats depth. Returns the
+    Limit plus a (kind, value) pair used as part of the eval-cache key so
+    results from different limiters never collide.
+    """
+    if nodes:
+        return chess.engine.Limit(nodes=nodes), "nodes", int(nodes)
+    if time_s:
+        return chess.engine.Limit(time=time_s), "time_ms", int(time_s * 1000)
+    return chess.engine.Limit(depth=depth), "depth", int(depth)
+
+
+class EvalCache:
+    """
+    Persistent (position, limiter) -> eval cache keyed by Zobrist hash.
+
+    Openings and transpositions recur across games; a hit here turns a
+    full engine analysis into a single indexed SELECT. Entries are keyed
+    by limiter kind ("depth", "nodes", "time_ms") and replaced only by
+    larger budgets of the same kind; a smaller request is happy with any
+    entry at >= its budget. Inserts are buffered and flushed in batches
+    to keep write overhead off the hot path.
+    """
+
+    FLUSH_EVERY = 100
+
+    def __init__(self, path: Path | str):
+        self._conn = sqlite3.connect(str(path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Pre-limiter cache files keyed evals purely on depth; drop them.
+        cols = {r[1] for r in self._conn.execute("PRAGMA table_info(evals)")}
+        if cols and "lim_kind" not in cols:
+            self._conn.execute("DROP TABLE evals")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS evals ("
+            "zhash INTEGER NOT NULL, lim_kind TEXT NOT NULL, lim_value INTEGER NOT NULL, "
+            "kind TEXT, cp INTEGER, mate INTEGER, best_uci TEXT, "
+            "PRIMARY KEY (zhash, lim_kind))"
+        )
+        self._pending: list[tuple] = []
+
+    def get(self, board: chess.Board, lim_kind: str, lim_value: int):
+        """
+        Returns (eval_dict, best_move) on hit, else None.
+        """
+        h = _signed64(chess.polyglot.zobrist_hash(board))
+        row = self._conn.execute(
+            "SELECT kind, cp, mate, best_uci FROM evals "
+            "WHERE zhash=? AND lim_kind=? AND lim_value>=?",
+            (h, lim_kind, lim_value),
+        ).fetchone()
+        if row is None:
+            return None
+        kind, cp, mate, best_uci = row
+        ev = {
+            "kind": kind,
+            "cp": int(cp) if kind == "cp" else None,
+            "mate": int(mate) if kind == "mate" else None,
+        }
+        best = chess.Move.from_uci(best_uci) if best_uci else None
+        return ev, best
+
+    def put(
+        self,
+        board: chess.Board,
+        lim_kind: str,
+        lim_value: int,
+        ev: dict,
+        best: chess.Move | None,
+    ) -> None:
+        h = _signed64(chess.polyglot.zobrist_hash(board))
+        self._pending.append(
+            (h, lim_kind, lim_value, ev["kind"], ev["cp"], ev["mate"], best.uci() if best else "")
+        )
+        if len(self._pending) >= self.FLUSH_EVERY:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO evals (zhash, lim_kind, lim_value, kind, cp, mate, best_uci) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            self._pending,
+        )
+        self._conn.commit()
+        self._pending.clear()
+
+    def close(self) -> None:
+        self.flush()
+        self._conn.close()
+
+
+# Constant sentinel passed as analyse(game=...): python-chess only sends
+# ucinewgame when the game key changes, so one sentinel per worker keeps the
+# engine's transposition table warm across games — opening and common
+# endgame positions recur in every game of a run.
+_TT_GAME = object()
+
+
+async def _evaluate(
+    board: chess.Board,
+    engine: chess.engine.UciProtocol,
+    limit: chess.engine.Limit,
+    lim_kind: str,
+    lim_value: int,
+    cache: EvalCache | None,
+    book: "chess.polyglot.MemoryMappedReader | None" = None,
+) -> tuple[dict, chess.Move | None]:
+    """
+    Evaluate a position: opening book first, then cache, engine on miss.
+    Returns (eval dict from White POV, best move or None).
+
+    In-book positions are established theory, so they get a canonical
+    0 cp eval and the book's preferred move without touching the engine —
+    the opening plies are where positions repeat across every game.
+    """
+    if book is not None:
+        entry = book.get(board)
+        if entry is not None:
+            return {"kind": "cp", "cp": 0, "mate": None}, entry.move
+    if cache is not None:
+        hit = cache.get(board, lim_kind, lim_value)
+        if hit is not None:
+            return hit
+    info = await engine.analyse(board, limit, multipv=2, game=_TT_GAME)
+    ev = score_white(info)
+    pv = _first_info(info).get("pv") or []
+    best = pv[0] if pv else None
+    if cache is not None:
+        cache.put(board, lim_kind, lim_value, ev, best)
+    return ev, best
+
+
 def safe_san(board: chess.Board, move: chess.Move) -> str:
     """
     SAN can fail if we’re in a weird parsing edge; fall back to UCI.
@@ -105,11 +449,47 @@ def safe_san(board: chess.Board, move: chess.Move) -> str:
         return move.uci()
 
 
-def analyze_game_pgn(
+class MainlineOnlyVisitor(chess.pgn.BaseVisitor):
+    """
+    PGN visitor that collects just the starting position and the mainline
+    moves. The analysis loop only ever walks mainline_moves(), so building
+    the full GameNode tree (comments, NAGs, clock annotations, variations —
+    Chess.com PGNs carry a %clk comment on every move) is pure overhead;
+    this skips all of it at parse time.
+    """
+
+    def __init__(self) -> None:
+        self.board: chess.Board | None = None
+        self.moves: list[chess.Move] = []
+
+    def visit_board(self, board: chess.Board) -> None:
+        if self.board is None:
+            # first call is the initial position (parser mutates its board
+            # in place afterwards, so snapshot it)
+            self.board = board.copy(stack=False)
+
+    def visit_move(self, board: chess.Board, move: chess.Move) -> None:
+        self.moves.append(move)
+
+    def begin_variation(self):
+        return chess.pgn.SKIP
+
+    def handle_error(self, error: Exception) -> None:
+        # tolerate malformed movetext the same way GameBuilder does:
+        # keep what parsed so far instead of failing the whole game
+        pass
+
+    def result(self) -> tuple["chess.Board | None", list[chess.Move]]:
+        return self.board, self.moves
+
+
+async def analyze_game_pgn(
     pgn_text: str,
     my_color: chess.Color,
-    engine: chess.engine.SimpleEngine,
+    engine: chess.engine.UciProtocol,
     depth: int,
+    nodes: int,
+    time_s: float,
     blunder_cp: int,
     mistake_cp: int,
     inacc_cp: int,
@@ -117,17 +497,24 @@ def analyze_game_pgn(
     end_time_utc: str,
     opponent: str,
     my_color_str: str,
-) -> tuple[dict, list[dict], list[dict], list[chess.pgn.Game]]:
+    cache: EvalCache | None = None,
+    book: "chess.polyglot.MemoryMappedReader | None" = None,
+) -> tuple[dict, list[list], list[list], list[chess.pgn.Game], str]:
     """
-    Correct blunder logic:
+    Correct blunder logic, one engine query per ply:
       For your move at position P:
-        - best = engine.play(P)
-        - eval_best_after = engine.analyse(P + best)
-        - eval_played_after = engine.analyse(P + played)
+        - analyse(P, multipv=2) gives the best move (top PV) AND the eval
+          you'd keep by playing it (the position eval itself)
+        - analyse(P + played) gives the eval you actually got
         - loss is computed vs best (from your perspective)
+      The "after" eval of ply N is reused as the "before" eval of ply N+1,
+      so each position is analysed exactly once per game. Pre-move positions
+      are kept as O(1) bitboard snapshots (board.copy(stack=False)) rather
+      than FEN strings; the blunder path builds its puzzle straight from the
+      snapshot and only serializes FENs for rows that get written.
     """
-    game = chess.pgn.read_game(io.StringIO(pgn_text))
-    if game is None:
+    parsed = chess.pgn.read_game(io.StringIO(pgn_text), Visitor=MainlineOnlyVisitor)
+    if parsed is None or parsed[0] is None:
         return (
             {
                 "plies_analyzed": 0,
@@ -141,32 +528,51 @@ def analyze_game_pgn(
             [],
             [],
             [],
+            "",
         )
 
-    board = game.board()
+    board, moves = parsed
 
-    inaccuracies = mistakes = blunders = 0
-    max_cp_loss = 0
-    max_wp_loss = 0.0
-    max_wp_swing = 0.0
     plies_analyzed = 0
 
-    move_rows: list[dict] = []
-    blunder_rows: list[dict] = []
+    # per-ply numeric values, reduced to counters/maxima after the loop
+    cp_loss_vals: list[int] = []
+    wp_loss_vals: list[float] = []
+    wp_swing_vals: list[float] = []
+
+    move_rows: list[list] = []
+    blunder_rows: list[list] = []
     blunder_games: list[chess.pgn.Game] = []
 
+    # Pre-move snapshot per ply (bitboard copy, no move stack) aligned with
+    # move_rows; FEN strings are generated once in a post-pass instead of
+    # twice per ply in the hot loop.
+    boards_before: list[chess.Board] = []
+
+    limit, lim_kind, lim_value = resolve_limit(depth, nodes, time_s)
+
+    # (eval, best move) of the current position, carried from the previous
+    # iteration's "after" analysis so each position is analysed exactly once.
+    prev_eval: tuple[dict, chess.Move | None] | None = None
+
+    # Speculative analysis of the next ply's position, kicked off before the
+    # Python-side row building for the current ply runs (at most one task in
+    # flight — issuing a second command would preempt the running search).
+    next_task: asyncio.Task | None = None
+
     ply = 0
-    for move in game.mainline_moves():
+    for move_i, move in enumerate(moves):
         ply += 1
         side_to_move = board.turn
         is_my_move = (side_to_move == my_color)
 
-        fen_before = board.fen()
         move_number = board.fullmove_number
 
-        # Baseline eval for graphing (not used for blunder scoring)
-        info_before = engine.analyse(board, chess.engine.Limit(depth=depth))
-        eval_before = score_white(info_before)
+        if prev_eval is None:
+            prev_eval = await _evaluate(board, engine, limit, lim_kind, lim_value, cache, book)
+        # Best move of the BEFORE position is the engine's top PV here
+        # (this is exactly what engine.play would have returned).
+        eval_before, best_move = prev_eval
         wp_before = win_prob_from_eval(eval_before)
 
         san_played = safe_san(board, move)
@@ -180,65 +586,61 @@ def analyze_game_pgn(
         cp_loss = ""
         label = ""
 
-        eval_best_after = {"kind": "", "cp": "", "mate": ""}
-        eval_play_after = {"kind": "", "cp": "", "mate": ""}
+        eval_best_after = eval_play_after = _EVAL_EMPTY
 
-        if is_my_move:
-            plies_analyzed += 1
+        if is_my_move and best_move is not None:
+            best_move_uci = best_move.uci()
+            best_move_san = safe_san(board, best_move)
 
-            # --- determine best move from the BEFORE position ---
-            try:
-                best = engine.play(board, chess.engine.Limit(depth=depth))
-                if best.move is not None:
-                    best_move_uci = best.move.uci()
-                    best_move_san = safe_san(board, best.move)
-            except Exception:
-                best_move_uci = ""
-                best_move_san = ""
+        # push played move to advance mainline
+        board_before = board.copy(stack=False)
+        boards_before.append(board_before)
+        board.push(move)
 
-            # --- eval after best and after played (same depth, same starting position) ---
-            try:
-                if best_move_uci:
-                    b_best = board.copy()
-                    b_best.push(chess.Move.from_uci(best_move_uci))
-                    info_best_after = engine.analyse(b_best, chess.engine.Limit(depth=depth))
-                    eb = score_white(info_best_after)
-                    eval_best_after = eb
-                    wp_best = win_prob_from_eval(eb)
-                    wp_best_after = f"{wp_best:.6f}"
-                else:
-                    wp_best = None
-            except Exception:
-                wp_best = None
+        if next_task is not None:
+            after_eval = await next_task
+        else:
+            after_eval = await _evaluate(board, engine, limit, lim_kind, lim_value, cache, book)
+        eval_after = after_eval[0]
+        wp_after = win_prob_from_eval(eval_after)
 
-            try:
-                b_play = board.copy()
-                b_play.push(move)
-                info_play_after = engine.analyse(b_play, chess.engine.Limit(depth=depth))
-                ep = score_white(info_play_after)
-                eval_play_after = ep
-                wp_play = win_prob_from_eval(ep)
-                wp_played_after = f"{wp_play:.6f}"
-            except Exception:
-                wp_play = None
+        # Pipeline: start analysing the position after the NEXT move now, so
+        # the engine searches while Python builds this ply's rows. sleep(0)
+        # yields one loop tick so the go command actually reaches the pipe.
+        if move_i + 1 < len(moves):
+            b_next = board.copy(stack=False)
+            b_next.push(moves[move_i + 1])
+            next_task = asyncio.create_task(
+                _evaluate(b_next, engine, limit, lim_kind, lim_value, cache, book)
+            )
+            await asyncio.sleep(0)
+        else:
+            next_task = None
+
+        if is_my_move:
+            plies_analyzed += 1
+
+            # Playing the best move keeps the position eval (minimax), so the
+            # BEFORE eval doubles as "eval after best"; the AFTER eval is
+            # "eval after played".
+            eval_best_after = eval_before
+            eval_play_after = eval_after
+            wp_best = wp_before
+            wp_play = wp_after
+            wp_best_after = f"{wp_best:.6f}"
+            wp_played_after = f"{wp_play:.6f}"
 
             # compute wp_loss from your perspective
-            if wp_best is not None and wp_play is not None:
-                if my_color == chess.WHITE:
-                    loss_wp = max(0.0, wp_best - wp_play)
-                else:
-                    # as Black, you prefer LOWER white win prob
-                    loss_wp = max(0.0, wp_play - wp_best)
-                wp_loss = f"{loss_wp:.6f}"
-                max_wp_loss = max(max_wp_loss, loss_wp)
-
-            # compute cp_loss (only when both after-evals are cp)
-            if (
-                isinstance(eval_best_after, dict)
-                and isinstance(eval_play_after, dict)
-                and eval_best_after.get("kind") == "cp"
-                and eval_play_after.get("kind") == "cp"
-            ):
+            if my_color == chess.WHITE:
+                loss_wp = max(0.0, wp_best - wp_play)
+            else:
+                # as Black, you prefer LOWER white win prob
+                loss_wp = max(0.0, wp_play - wp_best)
+            wp_loss = f"{loss_wp:.6f}"
+            wp_loss_vals.append(loss_wp)
+
+            # compute cp_loss (only when both evals are cp)
+            if eval_best_after.get("kind") == "cp" and eval_play_after.get("kind") == "cp":
                 cp_best = int(eval_best_after["cp"])
                 cp_play = int(eval_play_after["cp"])
 
@@ -248,99 +650,94 @@ def analyze_game_pgn(
                     loss_cp = max(0, cp_play - cp_best)
 
                 cp_loss = int(loss_cp)
-                max_cp_loss = max(max_cp_loss, int(loss_cp))
+                cp_loss_vals.append(cp_loss)
 
                 if loss_cp >= blunder_cp:
-                    blunders += 1
                     label = "blunder"
                 elif loss_cp >= mistake_cp:
-                    mistakes += 1
                     label = "mistake"
                 elif loss_cp >= inacc_cp:
-                    inaccuracies += 1
                     label = "inaccuracy"
 
-        # push played move to advance mainline
-        board.push(move)
-
-        fen_after = board.fen()
-        info_after = engine.analyse(board, chess.engine.Limit(depth=depth))
-        eval_after = score_white(info_after)
-        wp_after = win_prob_from_eval(eval_after)
+        # reuse the AFTER analysis as the next ply's BEFORE analysis
+        prev_eval = after_eval
 
         # purely for graphing: swing of the eval bar from before->after played
         wp_swing = abs(wp_after - wp_before)
-        max_wp_swing = max(max_wp_swing, wp_swing)
+        wp_swing_vals.append(wp_swing)
 
+        # values in MOVE_FIELDS order, written with a plain csv.writer
         move_rows.append(
-            {
-                "game_url": game_url,
-                "end_time_utc": end_time_utc,
-                "opponent": opponent,
-                "my_color": my_color_str,
-                "ply": ply,
-                "move_number": move_number,
-                "move_san": san_played,
-                "move_uci": played_uci,
-                "side_to_move": "white" if side_to_move == chess.WHITE else "black",
-                "is_my_move": int(is_my_move),
+            [
+                game_url,
+                end_time_utc,
+                opponent,
+                my_color_str,
+                ply,
+                move_number,
+                san_played,
+                played_uci,
+                "white" if side_to_move == chess.WHITE else "black",
+                int(is_my_move),
 
                 # baseline eval before and after played (graphing)
-                "eval_before_kind": eval_before["kind"],
-                "eval_before_cp": eval_before["cp"] if eval_before["kind"] == "cp" else "",
-                "eval_before_mate": eval_before["mate"] if eval_before["kind"] == "mate" else "",
-                "eval_after_kind": eval_after["kind"],
-                "eval_after_cp": eval_after["cp"] if eval_after["kind"] == "cp" else "",
-                "eval_after_mate": eval_after["mate"] if eval_after["kind"] == "mate" else "",
-                "wp_before": f"{wp_before:.6f}",
-                "wp_after": f"{wp_after:.6f}",
-                "wp_swing": f"{wp_swing:.6f}",
+                eval_before["kind"],
+                eval_before["cp"] if eval_before["kind"] == "cp" else "",
+                eval_before["mate"] if eval_before["kind"] == "mate" else "",
+                eval_after["kind"],
+                eval_after["cp"] if eval_after["kind"] == "cp" else "",
+                eval_after["mate"] if eval_after["kind"] == "mate" else "",
+                f"{wp_before:.6f}",
+                f"{wp_after:.6f}",
+                f"{wp_swing:.6f}",
 
                 # correct blunder scoring vs best (only meaningful on your moves)
-                "best_move_san": best_move_san,
-                "best_move_uci": best_move_uci,
-                "eval_best_after_kind": eval_best_after.get("kind", "") if isinstance(eval_best_after, dict) else "",
-                "eval_best_after_cp": eval_best_after.get("cp", "") if isinstance(eval_best_after, dict) and eval_best_after.get("kind") == "cp" else "",
-                "eval_best_after_mate": eval_best_after.get("mate", "") if isinstance(eval_best_after, dict) and eval_best_after.get("kind") == "mate" else "",
-                "eval_played_after_kind": eval_play_after.get("kind", "") if isinstance(eval_play_after, dict) else "",
-                "eval_played_after_cp": eval_play_after.get("cp", "") if isinstance(eval_play_after, dict) and eval_play_after.get("kind") == "cp" else "",
-                "eval_played_after_mate": eval_play_after.get("mate", "") if isinstance(eval_play_after, dict) and eval_play_after.get("kind") == "mate" else "",
-                "wp_best_after": wp_best_after,
-                "wp_played_after": wp_played_after,
-                "wp_loss": wp_loss,
-                "cp_loss": cp_loss,
-                "label": label,
-
-                "fen_before": fen_before,
-                "fen_after": fen_after,
-            }
+                best_move_san,
+                best_move_uci,
+                eval_best_after["kind"],
+                eval_best_after["cp"] if eval_best_after["kind"] == "cp" else "",
+                eval_best_after["mate"] if eval_best_after["kind"] == "mate" else "",
+                eval_play_after["kind"],
+                eval_play_after["cp"] if eval_play_after["kind"] == "cp" else "",
+                eval_play_after["mate"] if eval_play_after["kind"] == "mate" else "",
+                wp_best_after,
+                wp_played_after,
+                wp_loss,
+                cp_loss,
+                label,
+
+                # fen_before, filled in by the FEN post-pass below
+                "",
+            ]
         )
 
         if is_my_move and label == "blunder":
+            fen_before = board_before.fen()
+            fen_after = board.fen()
+            # values in BLUNDER_FIELDS order
             blunder_rows.append(
-                {
-                    "game_url": game_url,
-                    "end_time_utc": end_time_utc,
-                    "opponent": opponent,
-                    "my_color": my_color_str,
-                    "ply": ply,
-                    "move_number": move_number,
-                    "played_move_san": san_played,
-                    "played_move_uci": played_uci,
-                    "best_move_san": best_move_san,
-                    "best_move_uci": best_move_uci,
-                    "wp_loss": wp_loss,
-                    "cp_loss": cp_loss,
-                    "fen_before": fen_before,
-                    "fen_after": fen_after,
-                }
+                [
+                    game_url,
+                    end_time_utc,
+                    opponent,
+                    my_color_str,
+                    ply,
+                    move_number,
+                    san_played,
+                    played_uci,
+                    best_move_san,
+                    best_move_uci,
+                    wp_loss,
+                    cp_loss,
+                    fen_before,
+                    fen_after,
+                ]
             )
 
-            # PGN puzzle from pre-move position
+            # PGN puzzle from pre-move position (snapshot, no FEN re-parse)
             try:
-                puzzle_board = chess.Board(fen_before)
                 pgn_game = chess.pgn.Game()
-                pgn_game.setup(puzzle_board)
+                pgn_game.setup(board_before)
 
                 pgn_game.headers["Event"] = "Blunder Moment"
                 pgn_game.headers["Site"] = ""
@@ -356,29 +753,146 @@ def analyze_game_pgn(
                 pgn_game.headers["Black"] = opponent if my_color == chess.WHITE else "You"
                 pgn_game.headers["Result"] = "*"
 
-                played = chess.Move.from_uci(played_uci)
-                main = pgn_game.add_main_variation(played)
+                # the outer-loop Move objects are still in hand; no UCI re-parse
+                main = pgn_game.add_main_variation(move)
                 main.comment = f"Blunder vs best. cp_loss={cp_loss} wp_loss={wp_loss}"
 
-                if best_move_uci:
-                    bestm = chess.Move.from_uci(best_move_uci)
-                    var = pgn_game.add_variation(bestm)
+                if best_move is not None:
+                    var = pgn_game.add_variation(best_move)
                     var.comment = "Best move"
 
                 blunder_games.append(pgn_game)
             except Exception:
                 pass
 
+    # FEN post-pass: serialize each position exactly once at emission time.
+    # Only fen_before is stored per row; the game's final position goes into
+    # positions_final.csv (fen_after of ply N is fen_before of ply N+1).
+    fen_final = ""
+    if move_rows:
+        for row, b in zip(move_rows, boards_before):
+            row[-1] = b.fen()
+        fen_final = board.fen()
+
+    # Single-pass reductions over the collected per-ply values, replacing
+    # per-ply counter and max bookkeeping inside the hot loop.
     summary = {
         "plies_analyzed": plies_analyzed,
-        "inaccuracies": inaccuracies,
-        "mistakes": mistakes,
-        "blunders": blunders,
-        "max_cp_loss": max_cp_loss,
-        "max_wp_loss": max_wp_loss,
-        "max_wp_swing": max_wp_swing,
+        "inaccuracies": sum(1 for v in cp_loss_vals if inacc_cp <= v < mistake_cp),
+        "mistakes": sum(1 for v in cp_loss_vals if mistake_cp <= v < blunder_cp),
+        "blunders": sum(1 for v in cp_loss_vals if v >= blunder_cp),
+        "max_cp_loss": max(cp_loss_vals, default=0),
+        "max_wp_loss": max(wp_loss_vals, default=0.0),
+        "max_wp_swing": max(wp_swing_vals, default=0.0),
     }
-    return summary, move_rows, blunder_rows, blunder_games
+    return summary, move_rows, blunder_rows, blunder_games, fen_final
+
+
+async def _configure_engine(engine: chess.engine.UciProtocol, hash_mb: int) -> None:
+    """
+    Configure a pool worker's engine for analysis throughput: one search
+    thread (parallelism comes from the pool), a deliberately sized hash so
+    iterative deepening gets real transposition hits, NNUE eval and analyse
+    mode where the binary supports them.
+    """
+    desired = {
+        "Threads": 1,
+        "Hash": hash_mb,
+        "Use NNUE": True,  # dropped from newer Stockfish (always on)
+        "UCI_AnalyseMode": True,
+    }
+    await engine.configure({k: v for k, v in desired.items() if k in engine.options})
+
+
+# Per-worker-process event loop, engine, eval cache + analysis settings, set
+# up by _pool_init. The async UCI protocol is driven by one long-lived loop
+# per worker so commands go straight to the engine pipe without the
+# SimpleEngine future-per-call indirection.
+_WORKER_LOOP: asyncio.AbstractEventLoop | None = None
+_WORKER_ENGINE: chess.engine.UciProtocol | None = None
+_WORKER_TRANSPORT = None
+_WORKER_CACHE: EvalCache | None = None
+_WORKER_BOOK: chess.polyglot.MemoryMappedReader | None = None
+_WORKER_CFG: dict = {}
+
+
+def _worker_shutdown() -> None:
+    try:
+        _WORKER_LOOP.run_until_complete(_WORKER_ENGINE.quit())
+    except Exception:
+        pass
+    _WORKER_LOOP.close()
+
+
+def _pool_init(
+    stockfish_path: str,
+    cache_path: str,
+    depth: int,
+    nodes: int,
+    time_s: float,
+    blunder_cp: int,
+    mistake_cp: int,
+    inacc_cp: int,
+    hash_mb: int = 128,
+    book_path: str = "",
+) -> None:
+    """
+    Start one persistent single-threaded Stockfish per worker process and
+    open the shared on-disk eval cache (WAL mode handles the concurrency).
+    """
+    global _WORKER_LOOP, _WORKER_ENGINE, _WORKER_TRANSPORT, _WORKER_CACHE, _WORKER_BOOK
+    asyncio.set_event_loop_policy(chess.engine.EventLoopPolicy())
+    _WORKER_LOOP = asyncio.new_event_loop()
+    asyncio.set_event_loop(_WORKER_LOOP)
+
+    async def start():
+        transport, engine = await chess.engine.popen_uci(stockfish_path)
+        await _configure_engine(engine, hash_mb)
+        return transport, engine
+
+    _WORKER_TRANSPORT, _WORKER_ENGINE = _WORKER_LOOP.run_until_complete(start())
+    atexit.register(_worker_shutdown)
+    _WORKER_CACHE = EvalCache(cache_path)
+    atexit.register(_WORKER_CACHE.close)
+    if book_path:
+        _WORKER_BOOK = chess.polyglot.open_reader(book_path)
+        atexit.register(_WORKER_BOOK.close)
+    _WORKER_CFG.update(
+        depth=depth,
+        nodes=nodes,
+        time_s=time_s,
+        blunder_cp=blunder_cp,
+        mistake_cp=mistake_cp,
+        inacc_cp=inacc_cp,
+    )
+
+
+def _analyze_one(job: dict):
+    """
+    Worker entry point: analyze one game with this process's engine on the
+    process's persistent event loop. Returns the job metadata alongside the
+    analyze_game_pgn result.
+    """
+    result = _WORKER_LOOP.run_until_complete(
+        analyze_game_pgn(
+            pgn_text=job["pgn"],
+            my_color=chess.WHITE if job["my_color"] == "white" else chess.BLACK,
+            engine=_WORKER_ENGINE,
+            depth=_WORKER_CFG["depth"],
+            nodes=_WORKER_CFG["nodes"],
+            time_s=_WORKER_CFG["time_s"],
+            blunder_cp=_WORKER_CFG["blunder_cp"],
+            mistake_cp=_WORKER_CFG["mistake_cp"],
+            inacc_cp=_WORKER_CFG["inacc_cp"],
+            game_url=job["game_url"],
+            end_time_utc=job["end_time_utc"],
+            opponent=job["opponent"],
+            my_color_str=job["my_color"],
+            cache=_WORKER_CACHE,
+            book=_WORKER_BOOK,
+        )
+    )
+    return job, result
 
 
 def _resolve_out(data_dir: Path, name_or_path: str) -> Path:
@@ -394,6 +908,33 @@ def main():
     ap.add_argument("--max-games", type=int, default=50)
     ap.add_argument("--stockfish", default="stockfish", help="Path to stockfish binary")
     ap.add_argument("--depth", type=int, default=12)
+    ap.add_argument(
+        "--nodes",
+        type=int,
+        default=50000,
+        help="Node budget per analysis; bounds work per position so endgame "
+        "spikes can't dominate the run. 0 falls back to --time/--depth "
+        "(default: 50000)",
+    )
+    ap.add_argument(
+        "--time",
+        type=float,
+        default=0.0,
+        help="Seconds per analysis when --nodes is 0 (0 = use --depth)",
+    )
+    ap.add_argument(
+        "--hash-mb",
+        type=int,
+        default=128,
+        help="Stockfish hash size per worker in MB; keep workers * hash-mb "
+        "comfortably under system RAM (default: 128)",
+    )
+    ap.add_argument(
+        "--book",
+        default="",
+        help="Polyglot opening book (.bin); in-book positions skip the "
+        "engine and get a canonical 0 cp eval (default: off)",
+    )
 
     ap.add_argument("--data-dir", default="data", help="Directory for generated files (default: data)")
 
@@ -418,6 +959,7 @@ def main():
 
     out_path = _resolve_out(data_dir, args.out)
     moves_path = _resolve_out(data_dir, args.moves_out)
+    positions_path = moves_path.with_name("positions_final.csv")
     blunders_csv_path = _resolve_out(data_dir, args.blunders_csv)
     blunders_pgn_path = _resolve_out(data_dir, args.blunders_pgn)
 
@@ -433,15 +975,22 @@ def main():
             "Or run with: --stockfish /path/to/stockfish"
         )
 
-    engine = chess.engine.SimpleEngine.popen_uci(args.stockfish)
-
-    summary_rows = []
-    all_move_rows: list[dict] = []
-    all_blunder_rows: list[dict] = []
-    all_blunder_games: list[chess.pgn.Game] = []
-
+    # Games already analyzed in earlier runs are skipped entirely and the
+    # output files are appended to, so a re-run after a few new games costs
+    # O(new games), not O(max-games).
+    analyzed_path = data_dir / "analyzed_games.json"
     try:
-        for g in iter_recent_games(args.username, args.max_games, args.user_agent):
+        analyzed: set[str] = set(json.loads(analyzed_path.read_text(encoding="utf-8")))
+    except (FileNotFoundError, ValueError):
+        analyzed = set()
+
+    def iter_jobs():
+        """
+        Yields one analysis job dict per game (network-bound phase).
+        """
+        for g in iter_recent_games(args.username, args.max_games, args.user_agent, cache_dir=data_dir / "cache"):
+            if g.get("url") in analyzed:
+                continue
             my_color = pick_my_color(g, args.username)
             if my_color is None:
                 continue
@@ -461,156 +1010,162 @@ def main():
             black = g.get("black", {}) or {}
             my_color_str = "white" if my_color == chess.WHITE else "black"
 
-            opponent = (black if my_color == chess.WHITE else white).get("username", "")
-            time_class = g.get("time_class", "")
-            rules = g.get("rules", "")
-            url = g.get("url", "")
+            accuracies = g.get("accuracies") or {}
 
-            my_rating = (white if my_color == chess.WHITE else black).get("rating", "")
-            my_result = (white if my_color == chess.WHITE else black).get("result", "")
+            yield {
+                "pgn": pgn,
+                "my_color": my_color_str,
+                "game_url": g.get("url", ""),
+                "end_time_utc": end_dt,
+                "opponent": (black if my_color == chess.WHITE else white).get("username", ""),
+                "time_class": g.get("time_class", ""),
+                "rules": g.get("rules", ""),
+                "my_rating": (white if my_color == chess.WHITE else black).get("rating", ""),
+                "my_result": (white if my_color == chess.WHITE else black).get("result", ""),
+                "my_acc": accuracies.get(my_color_str, ""),
+            }
 
-            accuracies = g.get("accuracies") or {}
-            my_acc = accuracies.get("white" if my_color == chess.WHITE else "black", "")
-
-            stats, move_rows, blunder_rows, blunder_games = analyze_game_pgn(
-                pgn_text=pgn,
-                my_color=my_color,
-                engine=engine,
-                depth=args.depth,
-                blunder_cp=args.blunder_cp,
-                mistake_cp=args.mistake_cp,
-                inacc_cp=args.inacc_cp,
-                game_url=url,
-                end_time_utc=end_dt,
-                opponent=opponent,
-                my_color_str=my_color_str,
-            )
+    # Producer thread: fetch games with a small prefetch buffer while the
+    # engine pool below chews on whatever has already arrived, hiding HTTP
+    # latency behind ongoing Stockfish work.
+    job_q: queue.Queue = queue.Queue(maxsize=4)
+
+    def produce():
+        # A fetch failure must not look like a normal end of jobs: put the
+        # exception itself on the queue so the consumer can re-raise it
+        # after finishing the games already in flight.
+        try:
+            for job in iter_jobs():
+                job_q.put(job)
+        except Exception as exc:
+            job_q.put(exc)
+        else:
+            job_q.put(None)
+
+    threading.Thread(target=produce, daemon=True).start()
+
+    summary_rows = []
+    move_row_count = 0
+    blunder_row_count = 0
+    blunder_game_count = 0
+
+    # Phase 2: analyze games in parallel, one engine per worker process.
+    # Move/blunder rows and puzzle PGNs are streamed to disk as each game
+    # finishes so memory stays bounded regardless of --max-games; only the
+    # small summary (one row per game) is held back for the final sort.
+    try:
+        with (
+            open(moves_path, "a", newline="", encoding="utf-8", buffering=1 << 20) as moves_f,
+            open(positions_path, "a", newline="", encoding="utf-8") as positions_f,
+            open(blunders_csv_path, "a", newline="", encoding="utf-8", buffering=1 << 20) as blunders_f,
+            open(blunders_pgn_path, "a", encoding="utf-8", buffering=1 << 20) as pgn_f,
+        ):
+            moves_w = csv.writer(moves_f)
+            if moves_f.tell() == 0:
+                moves_w.writerow(MOVE_FIELDS)
+            positions_w = csv.writer(positions_f)
+            if positions_f.tell() == 0:
+                positions_w.writerow(POSITION_FIELDS)
+            blunders_w = csv.writer(blunders_f)
+            if blunders_f.tell() == 0:
+                blunders_w.writerow(BLUNDER_FIELDS)
+            exporter = chess.pgn.FileExporter(pgn_f)
+
+            with ProcessPoolExecutor(
+                max_workers=os.cpu_count(),
+                mp_context=get_context("spawn"),
+                initializer=_pool_init,
+                initargs=(
+                    args.stockfish,
+                    str(data_dir / "eval_cache.sqlite"),
+                    args.depth,
+                    args.nodes,
+                    args.time,
+                    args.blunder_cp,
+                    args.mistake_cp,
+                    args.inacc_cp,
+                    args.hash_mb,
+                    args.book,
+                ),
+            ) as ex:
+
+                def handle(fut):
+                    nonlocal move_row_count, blunder_row_count, blunder_game_count
+                    job, (stats, move_rows, blunder_rows, blunder_games, fen_final) = fut.result()
+
+                    moves_w.writerows(move_rows)
+                    move_row_count += len(move_rows)
+                    if fen_final:
+                        positions_w.writerow([job["game_url"], fen_final])
+                    blunders_w.writerows(blunder_rows)
+                    blunder_row_count += len(blunder_rows)
+                    for bg in blunder_games:
+                        bg.accept(exporter)
+                        pgn_f.write("\n\n")
+                    blunder_game_count += len(blunder_games)
+
+                    summary_rows.append(
+                        {
+                            "end_time_utc": job["end_time_utc"],
+                            "time_class": job["time_class"],
+                            "rules": job["rules"],
+                            "color": job["my_color"],
+                            "opponent": job["opponent"],
+                            "my_rating_after": job["my_rating"],
+                            "my_result_code": job["my_result"],
+                            "my_accuracy": job["my_acc"],
+                            "plies_analyzed": stats["plies_analyzed"],
+                            "inaccuracies": stats["inaccuracies"],
+                            "mistakes": stats["mistakes"],
+                            "blunders": stats["blunders"],
+                            "max_cp_loss": stats["max_cp_loss"],
+                            "max_wp_loss": f'{stats["max_wp_loss"]:.6f}',
+                            "max_wp_swing": f'{stats["max_wp_swing"]:.6f}',
+                            "game_url": job["game_url"],
+                        }
+                    )
+                    analyzed.add(job["game_url"])
+
+                # Submit jobs as the producer delivers them, draining finished
+                # futures along the way so output streams while fetching is
+                # still in progress.
+                producer_error: Exception | None = None
+                futures: set = set()
+                while (job := job_q.get()) is not None:
+                    if isinstance(job, Exception):
+                        producer_error = job
+                        break
+                    futures.add(ex.submit(_analyze_one, job))
+                    done = {f for f in futures if f.done()}
+                    for f in done:
+                        handle(f)
+                    futures -= done
+                for f in as_completed(futures):
+                    handle(f)
+                if producer_error is not None:
+                    raise producer_error
 
-            all_move_rows.extend(move_rows)
-            all_blunder_rows.extend(blunder_rows)
-            all_blunder_games.extend(blunder_games)
-
-            summary_rows.append(
-                {
-                    "end_time_utc": end_dt,
-                    "time_class": time_class,
-                    "rules": rules,
-                    "color": my_color_str,
-                    "opponent": opponent,
-                    "my_rating_after": my_rating,
-                    "my_result_code": my_result,
-                    "my_accuracy": my_acc,
-                    "plies_analyzed": stats["plies_analyzed"],
-                    "inaccuracies": stats["inaccuracies"],
-                    "mistakes": stats["mistakes"],
-                    "blunders": stats["blunders"],
-                    "max_cp_loss": stats["max_cp_loss"],
-                    "max_wp_loss": f'{stats["max_wp_loss"]:.6f}',
-                    "max_wp_swing": f'{stats["max_wp_swing"]:.6f}',
-                    "game_url": url,
-                }
-            )
     finally:
-        engine.quit()
-
-    summary_fields = [
-        "end_time_utc",
-        "time_class",
-        "rules",
-        "color",
-        "opponent",
-        "my_rating_after",
-        "my_result_code",
-        "my_accuracy",
-        "plies_analyzed",
-        "inaccuracies",
-        "mistakes",
-        "blunders",
-        "max_cp_loss",
-        "max_wp_loss",
-        "max_wp_swing",
-        "game_url",
-    ]
-    with open(out_path, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=summary_fields)
-        w.writeheader()
-        w.writerows(summary_rows)
-
-    move_fields = [
-        "game_url",
-        "end_time_utc",
-        "opponent",
-        "my_color",
-        "ply",
-        "move_number",
-        "move_san",
-        "move_uci",
-        "side_to_move",
-        "is_my_move",
-
-        "eval_before_kind",
-        "eval_before_cp",
-        "eval_before_mate",
-        "eval_after_kind",
-        "eval_after_cp",
-        "eval_after_mate",
-        "wp_before",
-        "wp_after",
-        "wp_swing",
-
-        "best_move_san",
-        "best_move_uci",
-        "eval_best_after_kind",
-        "eval_best_after_cp",
-        "eval_best_after_mate",
-        "eval_played_after_kind",
-        "eval_played_after_cp",
-        "eval_played_after_mate",
-        "wp_best_after",
-        "wp_played_after",
-        "wp_loss",
-        "cp_loss",
-        "label",
-
-        "fen_before",
-        "fen_after",
-    ]
-    with open(moves_path, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=move_fields)
-        w.writeheader()
-        w.writerows(all_move_rows)
-
-    blunder_fields = [
-        "game_url",
-        "end_time_utc",
-        "opponent",
-        "my_color",
-        "ply",
-        "move_number",
-        "played_move_san",
-        "played_move_uci",
-        "best_move_san",
-        "best_move_uci",
-        "wp_loss",
-        "cp_loss",
-        "fen_before",
-        "fen_after",
-    ]
-    with open(blunders_csv_path, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=blunder_fields)
-        w.writeheader()
-        w.writerows(all_blunder_rows)
-
-    with open(blunders_pgn_path, "w", encoding="utf-8") as f:
-        exporter = chess.pgn.FileExporter(f)
-        for g in all_blunder_games:
-            g.accept(exporter)
-            f.write("\n\n")
+        # Persist outputs for exactly the games whose rows were appended,
+        # even when the run dies midway (Ctrl-C, a worker error): the
+        # append-mode CSVs above are written per game, so skipping this on
+        # failure would desync the skip-index from the files and make the
+        # next run append duplicate rows for games it already wrote.
+        # as_completed scrambles order; restore newest-first for the summary.
+        summary_rows.sort(key=lambda r: r["end_time_utc"], reverse=True)
+
+        with open(out_path, "a", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+            if f.tell() == 0:
+                w.writeheader()
+            w.writerows(summary_rows)
+
+        analyzed_path.write_text(json.dumps(sorted(analyzed)), encoding="utf-8")
 
     print(f"Wrote {len(summary_rows)} games to {out_path}")
-    print(f"Wrote {len(all_move_rows)} move rows to {moves_path}")
-    print(f"Wrote {len(all_blunder_rows)} blunders to {blunders_csv_path}")
-    print(f"Wrote {len(all_blunder_games)} PGN puzzles to {blunders_pgn_path}")
+    print(f"Wrote {move_row_count} move rows to {moves_path}")
+    print(f"Wrote {blunder_row_count} blunders to {blunders_csv_path}")
+    print(f"Wrote {blunder_game_count} PGN puzzles to {blunders_pgn_path}")
 
 
 if __name__ == "__main__":
@@ -1,14 +1,18 @@
 #!/usr/bin/env python3
 import argparse
 import csv
-import io
 import os
 import time
-from collections import defaultdict
+from operator import itemgetter
 
-import requests
-import chess
-import chess.pgn
+# requests and chess are imported lazily inside the functions that need
+# them: they dominate this module's import time (urllib3/ssl and the PGN
+# machinery respectively) and chess_cli pulls this module in for commands
+# that never touch the network or a board.
+
+
+# chapter-name suffix per color, looked up instead of re-branching per row
+SUFFIX = {"white": "as White", "black": "as Black"}
 
 
 def env_default(name: str, default: str = "") -> str:
@@ -19,56 +23,98 @@ def lichess_headers(token: str):
     return {"Authorization": f"Bearer {token}", "Accept": "application/json"}
 
 
-def import_chapter(study_id: str, token: str, pgn_text: str, name: str):
+def lichess_session(token: str):
+    """
+    Keep-alive session for study uploads: one TLS handshake for the whole
+    batch instead of one per chapter, with automatic backoff on 429
+    (requests honors Lichess's Retry-After).
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    s = requests.Session()
+    s.headers.update(lichess_headers(token))
+    # Only 429 is safe to retry: import-pgn is not idempotent, and a
+    # 502/504 can arrive after the server already created the chapter, so
+    # retrying those would duplicate it. 429 means the request was refused.
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429],
+        allowed_methods=["GET", "POST"],
+    )
+    s.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=retry))
+    return s
+
+
+def import_chapter(session, study_id: str, pgn_text: str, name: str):
+    import requests
+
     url = f"https://lichess.org/api/study/{study_id}/import-pgn"
     data = {"name": name, "pgn": pgn_text}
-    r = requests.post(url, headers=lichess_headers(token), data=data, timeout=30)
+    r = session.post(url, data=data, timeout=30)
     if r.status_code >= 400:
         raise requests.HTTPError(f"{r.status_code} {r.reason}\n{r.text[:2000]}", response=r)
     return r.text
 
 
 def parse_float(s: str, default: float = 0.0) -> float:
+    # Empty/missing fields are the common case in blunders.csv; skip them
+    # with a cheap truthiness check instead of raising+catching ValueError
+    # (each raise allocates an exception and traceback).
+    if not s:
+        return default
     try:
         return float(s)
-    except Exception:
+    except ValueError:
         return default
 
 
 def build_puzzle_pgn_from_row(row: dict) -> str:
+    """
+    One-move puzzle PGN, formatted directly. The shape is fixed (headers, a
+    single played move with a comment, optionally the best move as a
+    variation), so an f-string template replaces the chess.pgn Game tree
+    plus FileExporter visitor pass; the board is only used for SAN.
+    """
+    import chess
+
     fen_before = row["fen_before"].strip()
     played_uci = row["played_move_uci"].strip()
     best_uci = (row.get("best_move_uci") or "").strip()
 
     board = chess.Board(fen_before)
-    g = chess.pgn.Game()
-    g.setup(board)
 
-    # IMPORTANT: leave Site empty so Lichess can set it to the chapter URL
-    g.headers["Site"] = ""
-    g.headers["Event"] = "Biggest Blunder"
-    g.headers["Date"] = (row.get("end_time_utc", "")[:10] or "????-??-??").replace("-", ".")
-    g.headers["Annotator"] = row.get("game_url", "")  # Chess.com provenance
-    g.headers["White"] = "You" if row.get("my_color") == "white" else row.get("opponent", "Opponent")
-    g.headers["Black"] = row.get("opponent", "Opponent") if row.get("my_color") == "white" else "You"
-    g.headers["Result"] = "*"
+    date = (row.get("end_time_utc", "")[:10] or "????-??-??").replace("-", ".")
+    white = "You" if row.get("my_color") == "white" else row.get("opponent", "Opponent")
+    black = row.get("opponent", "Opponent") if row.get("my_color") == "white" else "You"
 
-    played = chess.Move.from_uci(played_uci)
-    node_main = g.add_main_variation(played)
+    num = f"{board.fullmove_number}." if board.turn == chess.WHITE else f"{board.fullmove_number}..."
+    played_san = board.san(chess.Move.from_uci(played_uci))
 
     wp_loss = row.get("wp_loss", "")
     wp_swing = row.get("wp_swing", "")
     cp_loss = row.get("cp_loss", "")
-    node_main.comment = f"Blunder vs best. cp_loss={cp_loss} wp_loss={wp_loss} (wp_swing={wp_swing})"
-
+    movetext = f"{num} {played_san} {{ Blunder vs best. cp_loss={cp_loss} wp_loss={wp_loss} (wp_swing={wp_swing}) }}"
     if best_uci:
-        bestm = chess.Move.from_uci(best_uci)
-        var = g.add_variation(bestm)
-        var.comment = "Best move"
+        movetext += f" ( {num} {board.san(chess.Move.from_uci(best_uci))} {{ Best move }} )"
+    movetext += " *"
 
-    buf = io.StringIO()
-    g.accept(chess.pgn.FileExporter(buf))
-    return buf.getvalue().strip() + "\n"
+    # IMPORTANT: leave Site empty so Lichess can set it to the chapter URL
+    return (
+        f'[Event "Biggest Blunder"]\n'
+        f'[Site ""]\n'
+        f'[Date "{date}"]\n'
+        f'[Round "?"]\n'
+        f'[White "{white}"]\n'
+        f'[Black "{black}"]\n'
+        f'[Result "*"]\n'
+        f'[Annotator "{row.get("game_url", "")}"]\n'
+        f'[SetUp "1"]\n'
+        f'[FEN "{fen_before}"]\n'
+        f"\n{movetext}\n"
+    )
 
 
 def upload_top_blunders(
@@ -80,35 +126,47 @@ def upload_top_blunders(
     sleep_s: float,
     dry_run: bool,
 ):
-    rows = []
-    with open(blunders_csv, "r", encoding="utf-8") as f:
-        for r in csv.DictReader(f):
-            if "played_move_uci" in r and r.get("fen_before"):
-                rows.append(r)
-
-    if not rows:
+    # Single pass with a running best per game: no intermediate rows list
+    # and no per-game grouping lists keeping every row alive — only the
+    # current winner of each game is retained, with its score so the final
+    # sort never re-parses the CSV strings. csv.reader + bound column
+    # indices; only the handful of winning rows get turned into dicts.
+    best: dict[str, tuple[float, list]] = {}
+    header: list = []
+    with open(blunders_csv, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None) or []
+        if "played_move_uci" in header and "fen_before" in header:
+            idx = {name: i for i, name in enumerate(header)}
+            url_i = idx["game_url"]
+            fen_i = idx["fen_before"]
+            metric_i = idx.get(metric)
+            for row in reader:
+                if len(row) < len(header) or not row[fen_i]:
+                    continue
+                score = parse_float(row[metric_i]) if metric_i is not None else 0.0
+                url = row[url_i]
+                cur = best.get(url)
+                if cur is None or score > cur[0]:
+                    best[url] = (score, row)
+
+    if not best:
         print("No rows found in blunders.csv")
         return
 
-    by_game = defaultdict(list)
-    for r in rows:
-        by_game[r["game_url"]].append(r)
-
-    picked = []
-    for _, items in by_game.items():
-        picked.append(max(items, key=lambda x: parse_float(x.get(metric, "0"))))
-
-    picked.sort(key=lambda x: parse_float(x.get(metric, "0")), reverse=True)
+    picked = sorted(best.values(), key=itemgetter(0), reverse=True)
     if limit and len(picked) > limit:
         picked = picked[:limit]
 
-    print(f"Selected {len(picked)} biggest blunders ({metric}) across {len(by_game)} games.")
+    print(f"Selected {len(picked)} biggest blunders ({metric}) across {len(best)} games.")
+
+    session = None if dry_run else lichess_session(token)
 
-    for i, r in enumerate(picked, 1):
+    for i, (_, row) in enumerate(picked, 1):
+        r = dict(zip(header, row))
         opp = r.get("opponent", "")
         metric_val = r.get(metric, "")
-        me_color = (r.get("my_color", "") or "").lower()
-        suffix = "as White" if me_color == "white" else "as Black" if me_color == "black" else "as ?"
+        suffix = SUFFIX.get((r.get("my_color", "") or "").lower(), "as ?")
         name = f"{i:02d} Biggest blunder vs {opp} ({metric_val}) — {suffix}"
 
         pgn_text = build_puzzle_pgn_from_row(r)
@@ -117,7 +175,7 @@ def upload_top_blunders(
             print(f"[DRY] {name} :: {r.get('game_url','')}")
             continue
 
-        resp = import_chapter(study_id, token, pgn_text, name)
+        resp = import_chapter(session, study_id, pgn_text, name)
         print(f"[{i}] uploaded: {name}")
         print(resp.strip()[:200])
         time.sleep(sleep_s)
@@ -1,8 +1,10 @@
 #!/usr/bin/env python3
 import argparse
 import csv
+import heapq
 import os
 from collections import defaultdict
+from operator import itemgetter
 from pathlib import Path
 
 # ANSI colors
@@ -14,26 +16,19 @@ RED = "\033[31m"
 DIM = "\033[2m"
 
 
-def _colored_dot(label: str, dot: str) -> str:
-    label = (label or "").strip().lower()
-    if label == "blunder":
-        return f"{RED}{dot}{RESET}"
-    if label == "mistake":
-        return f"{ORANGE}{dot}{RESET}"
-    if label == "inaccuracy":
-        return f"{YELLOW}{dot}{RESET}"
-    return f"{GREEN}{dot}{RESET}"
-
-
-def _plain_dot(label: str) -> str:
-    label = (label or "").strip().lower()
-    if label == "blunder":
-        return "B"
-    if label == "mistake":
-        return "m"
-    if label == "inaccuracy":
-        return "i"
-    return "."
+def _dot_table(dot: str, no_color: bool) -> tuple[dict, str]:
+    """
+    Label -> rendered dot lookup, built once per run instead of running a
+    strip/lower + branch chain for every move. Returns (table, default)
+    where default covers ok moves and any unknown label.
+    """
+    if no_color:
+        return {"blunder": "B", "mistake": "m", "inaccuracy": "i"}, "."
+    return {
+        "blunder": f"{RED}{dot}{RESET}",
+        "mistake": f"{ORANGE}{dot}{RESET}",
+        "inaccuracy": f"{YELLOW}{dot}{RESET}",
+    }, f"{GREEN}{dot}{RESET}"
 
 
 def _default_moves_path(data_dir: str) -> str:
@@ -61,68 +56,95 @@ def main(argv=None) -> int:
     if not moves_path.exists():
         raise SystemExit(f"Missing {moves_path}. Run: chess-study analyze ... first.")
 
-    # group rows by game_url
+    # group rows by game_url; csv.reader + bound column indices instead of
+    # DictReader, which would allocate a dict and hash every key per row
     games = defaultdict(list)
-    with moves_path.open("r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            games[r["game_url"]].append(r)
-
-    # newest first by end_time_utc (same per-game)
-    def game_sort_key(item):
-        rows = item[1]
-        return rows[0].get("end_time_utc", "")
-
-    game_items = sorted(games.items(), key=game_sort_key, reverse=True)[: args.limit]
+    end_i = opp_i = color_i = label_i = my_i = 0
+    with moves_path.open("r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header:
+            idx = {name: i for i, name in enumerate(header)}
+            url_i = idx["game_url"]
+            end_i = idx["end_time_utc"]
+            opp_i = idx["opponent"]
+            color_i = idx["my_color"]
+            label_i = idx["label"]
+            my_i = idx["is_my_move"]
+            for row in reader:
+                # skip truncated rows (e.g. the last line of a killed
+                # run's append) instead of crashing on a positional index
+                if len(row) < len(header):
+                    continue
+                games[row[url_i]].append(row)
+
+    # newest first by end_time_utc (same per-game): the key is extracted
+    # once per game, and when only --limit of many games survive, a heap
+    # keeps the winners in O(N log limit) instead of fully sorting
+    indexed = [(rows[0][end_i], url, rows) for url, rows in games.items()]
+    if 0 <= args.limit < len(indexed):
+        newest = heapq.nlargest(args.limit, indexed, key=itemgetter(0))
+    else:
+        newest = sorted(indexed, key=itemgetter(0), reverse=True)
+    game_items = [(url, rows) for _, url, rows in newest]
 
     sep = f"{DIM}|{RESET}" if not args.no_color else "|"
-
-    for idx, (game_url, rows) in enumerate(game_items, start=1):
-        rows.sort(key=lambda r: int(r.get("ply", "0") or 0))
-
-        opp = rows[0].get("opponent", "?")
-        my_color = rows[0].get("my_color", "?")
-
-        filtered = []
-        for r in rows:
-            if args.my_moves_only:
-                if str(r.get("is_my_move", "0")) == "1":
-                    filtered.append(r)
-            else:
-                filtered.append(r)
-
-        inacc_positions = []
-        mistake_positions = []
-        blunder_positions = []
-
+    dot_table, ok_dot = _dot_table(dot, args.no_color)
+
+    # hoist flag lookups out of the per-move loops
+    my_moves_only = args.my_moves_only
+    show_positions = args.show_positions
+    sep_every = args.sep_every
+
+    for n, (game_url, rows) in enumerate(game_items, start=1):
+        # chesscom.py writes each game's rows contiguously in ply order, so
+        # grouping preserves that order and no per-game re-sort is needed
+
+        opp = rows[0][opp_i] or "?"
+        my_color = rows[0][color_i] or "?"
+
+        if my_moves_only:
+            filtered = [r for r in rows if r[my_i] == "1"]
+        else:
+            filtered = rows
+
+        # Single pass: dots and separators are emitted inline, and labels
+        # are tallied with plain counters; the position lists are only kept
+        # when --show-positions will print them.
+        n_inacc = n_mistake = n_blunder = 0
+        inacc_positions: list[int] = []
+        mistake_positions: list[int] = []
+        blunder_positions: list[int] = []
+
+        last = len(filtered)
         bar_parts = []
         for i, r in enumerate(filtered, start=1):
-            label = (r.get("label") or "").strip().lower()
+            # chesscom.py writes labels in canonical lowercase, so no
+            # per-move strip/lower is needed before the table lookup
+            label = r[label_i]
             if label == "inaccuracy":
-                inacc_positions.append(i)
+                n_inacc += 1
+                if show_positions:
+                    inacc_positions.append(i)
             elif label == "mistake":
-                mistake_positions.append(i)
+                n_mistake += 1
+                if show_positions:
+                    mistake_positions.append(i)
             elif label == "blunder":
-                blunder_positions.append(i)
-
-            if args.no_color:
-                bar_parts.append(_plain_dot(label))
-            else:
-                bar_parts.append(_colored_dot(label, dot))
+                n_blunder += 1
+                if show_positions:
+                    blunder_positions.append(i)
 
-        # Insert separators every N dots
-        pretty = []
-        for i, ch in enumerate(bar_parts, start=1):
-            pretty.append(ch)
-            if args.sep_every > 0 and i % args.sep_every == 0 and i != len(bar_parts):
-                pretty.append(sep)
+            bar_parts.append(dot_table.get(label, ok_dot))
+            if sep_every > 0 and i != last and i % sep_every == 0:
+                bar_parts.append(sep)
 
-        bar = "".join(pretty)
+        bar = "".join(bar_parts)
 
-        print(f"{idx}) vs {opp}  ({my_color})  moves={len(filtered)}  url={game_url}")
+        print(f"{n}) vs {opp}  ({my_color})  moves={last}  url={game_url}")
         print("   " + bar)
-        print(f"   inacc={len(inacc_positions)}  mistake={len(mistake_positions)}  blunder={len(blunder_positions)}")
-        if args.show_positions:
+        print(f"   inacc={n_inacc}  mistake={n_mistake}  blunder={n_blunder}")
+        if show_positions:
             if inacc_positions:
                 print(f"   inacc at:   {', '.join(map(str, inacc_positions))}")
             if mistake_positions:
@@ -135,10 +157,10 @@ def main(argv=None) -> int:
     if args.no_color:
         print("Legend: . ok  i inacc  m mistake  B blunder")
     else:
-        print("Legend:", _colored_dot("", dot), "ok ",
-              _colored_dot("inaccuracy", dot), "inacc ",
-              _colored_dot("mistake", dot), "mistake ",
-              _colored_dot("blunder", dot), "blunder")
+        print("Legend:", ok_dot, "ok ",
+              dot_table["inaccuracy"], "inacc ",
+              dot_table["mistake"], "mistake ",
+              dot_table["blunder"], "blunder")
 
     return 0
 